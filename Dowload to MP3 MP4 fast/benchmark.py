@@ -0,0 +1,477 @@
+"""
+Benchmarks for YouTube/Spotify Downloader PRO
+Runs fully offline against a local HTTP server or a stub yt-dlp
+
+Usage:
+    python benchmark.py engines --jobs 20
+    python benchmark.py throughput --jobs 50 --workers 4 --speed 5000000
+    python benchmark.py fragments --levels 1 4 8
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from playlis import (
+    Config, Downloader, DownloadJob, DownloadPool, FileType, QualitySettings,
+    YOUTUBE_WATCH_URL, percentile, psutil, resource, yt_dlp
+)
+
+
+# ================= LOCAL MEDIA SERVER =================
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler without per-request logging"""
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class ThrottledHandler(QuietHandler):
+    """Static file handler with a per-connection speed cap and first-byte latency
+    
+    Mimics a CDN that serves each connection at a fixed rate, which is what
+    makes parallel fragment downloads pay off.
+    """
+    
+    def copyfile(self, source, outputfile):
+        time.sleep(self.server.latency)
+        speed = self.server.connection_speed
+        started = time.monotonic()
+        sent = 0
+        while True:
+            chunk = source.read(64 * 1024)
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            sent += len(chunk)
+            delay = sent / speed - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+
+def serve_directory(directory: Path, handler: type = QuietHandler) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve a directory on a random local port"""
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0),
+        partial(handler, directory=str(directory))
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# ================= STUB YT-DLP =================
+# Stand-in for yt-dlp: fakes extraction, prints --newline progress lines and
+# writes the output file at a set speed. Tuned through environment variables
+# so one script serves every job of a run.
+STUB_YTDLP_SOURCE = r'''
+import hashlib, json, os, random, re, sys, time
+
+args = sys.argv[1:]
+if "--version" in args:
+    print("stub")
+    sys.exit(0)
+
+size = int(os.environ.get("STUB_SIZE", "1048576"))
+speed = float(os.environ.get("STUB_SPEED", "0")) or float("inf")  # bytes/sec, 0 = unlimited
+failure_rate = float(os.environ.get("STUB_FAILURE_RATE", "0"))
+transient_rate = float(os.environ.get("STUB_TRANSIENT_RATE", "0"))
+query = args[-1]
+video_id = hashlib.md5(query.encode()).hexdigest()[:11]
+audio_format = args[args.index("--audio-format") + 1] if "--audio-format" in args else None
+info = {
+    "id": video_id, "extractor_key": "Youtube", "duration": 180,
+    "filesize": size, "filesize_approx": None, "title": "Track " + video_id,
+    "artist": "Stub Artist", "uploader": "Stub", "album": None,
+    "upload_date": "20240101", "webpage_url": query, "ext": "webm",
+}
+templates = [args[i + 1] for i, arg in enumerate(args) if arg == "--print"]
+outputs = [args[i + 1] for i, arg in enumerate(args) if arg == "-o" and not re.match(r"^[a-z_]{2,}:", args[i + 1])]
+
+
+def render(template, filepath=None):
+    template = re.sub(
+        r"%\(\.\{([^}]*)\}\)j",
+        lambda m: json.dumps({key: info.get(key) for key in m.group(1).split(",")}),
+        template
+    )
+    if filepath is not None:
+        template = template.replace("%(filepath)s", filepath)
+    return re.sub(r"%\((\w+)\)s", lambda m: str(info.get(m.group(1), "NA")), template)
+
+
+def emit(when, filepath=None):
+    for template in templates:
+        if template.startswith(when + ":"):
+            print(render(template[len(when) + 1:], filepath), flush=True)
+
+
+print(f"[youtube] Extracting URL: {query}", flush=True)
+print(f"[youtube] {video_id}: Downloading webpage", flush=True)
+print(f"[info] {video_id}: Downloading 1 format(s): 251", flush=True)
+emit("before_dl")
+
+path = render(outputs[0] if outputs else "%(title)s.%(ext)s")
+os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+print(f"[download] Destination: {path}", flush=True)
+# Each attempt rolls again, so transient failures usually pass on a retry
+roll = random.random()
+failure = "permanent" if roll < failure_rate else "transient" if roll < failure_rate + transient_rate else None
+fail_at = random.random() * size if failure else None
+total_mib = size / 1024 / 1024
+chunk = max(size // 20, 1)
+started = time.monotonic()
+written = 0
+with open(path + ".part", "wb") as f:
+    while written < size:
+        block = min(chunk, size - written)
+        f.write(b"\0" * block)
+        written += block
+        delay = written / speed - (time.monotonic() - started)
+        if delay > 0:
+            time.sleep(delay)
+        rate = written / max(time.monotonic() - started, 1e-6)
+        eta = int((size - written) / rate)
+        print(
+            f"[download] {written * 100 / size:5.1f}% of {total_mib:8.2f}MiB at {rate / 1024 / 1024:8.2f}MiB/s ETA {eta // 60:02d}:{eta % 60:02d}",
+            flush=True
+        )
+        if fail_at is not None and written >= fail_at:
+            if failure == "permanent":
+                print(f"ERROR: [youtube] {video_id}: Video unavailable", file=sys.stderr, flush=True)
+            else:
+                print("ERROR: [download] Got error: [Errno 104] Connection reset by peer", file=sys.stderr, flush=True)
+            sys.exit(1)
+os.replace(path + ".part", path)
+elapsed = time.monotonic() - started
+print(f"[download] 100% of {total_mib:8.2f}MiB in 00:00:{int(elapsed):02d} at {size / max(elapsed, 1e-6) / 1024 / 1024:.2f}MiB/s", flush=True)
+
+if audio_format:
+    final = os.path.splitext(path)[0] + "." + audio_format
+    print(f"[ExtractAudio] Destination: {final}", flush=True)
+    os.replace(path, final)
+    path = final
+print(f'[Metadata] Adding metadata to "{path}"', flush=True)
+emit("after_move", path)
+'''
+
+
+def write_hls_stream(directory: Path, segments: int, segment_size: int) -> Path:
+    """Write an HLS media playlist with random-byte segments"""
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:4", "#EXT-X-MEDIA-SEQUENCE:0"]
+    for i in range(segments):
+        (directory / f"seg{i:04d}.ts").write_bytes(os.urandom(segment_size))
+        lines += ["#EXTINF:4.0,", f"seg{i:04d}.ts"]
+    lines.append("#EXT-X-ENDLIST")
+    playlist = directory / "stream.m3u8"
+    playlist.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return playlist
+
+
+def write_stub_ytdlp(directory: Path) -> Path:
+    """Write the stub yt-dlp into a directory and return its executable path"""
+    script = directory / "stub_ytdlp.py"
+    script.write_text(STUB_YTDLP_SOURCE, encoding="utf-8")
+    if os.name == "nt":
+        launcher = directory / "yt-dlp.cmd"
+        launcher.write_text(f'@"{sys.executable}" "{script}" %*\r\n', encoding="utf-8")
+    else:
+        launcher = directory / "yt-dlp"
+        launcher.write_text(f"#!/bin/sh\nexec \"{sys.executable}\" \"{script}\" \"$@\"\n", encoding="utf-8")
+        launcher.chmod(0o755)
+    return launcher
+
+
+# ================= HELPERS =================
+def find_ytdlp(path: str) -> Path:
+    """Resolve the yt-dlp binary to benchmark against"""
+    if path:
+        return Path(path)
+    default = Config.YTDLP
+    if default.exists():
+        return default
+    found = shutil.which("yt-dlp")
+    if not found:
+        sys.exit("❌ ไม่พบ yt-dlp (ระบุด้วย --ytdlp)")
+    return Path(found)
+
+
+def summarize(name: str, durations: List[float]):
+    """Print one result row"""
+    print(
+        f"{name:<12} jobs={len(durations):<4} "
+        f"mean={statistics.mean(durations) * 1000:8.1f}ms "
+        f"median={statistics.median(durations) * 1000:8.1f}ms "
+        f"total={sum(durations):7.2f}s"
+    )
+
+
+class PeakMemorySampler:
+    """Peak RSS of this process plus its yt-dlp children, sampled in the background
+    
+    Without psutil only the largest single process is known (from
+    getrusage), which understates concurrent runs.
+    """
+    
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        if psutil is None:
+            return
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+    
+    def _sample(self):
+        process = psutil.Process()
+        while not self._stop.wait(self.interval):
+            total = 0
+            try:
+                for proc in [process] + process.children(recursive=True):
+                    total += proc.memory_info().rss
+            except psutil.Error:
+                pass  # a child exited between listing and reading it
+            self.peak = max(self.peak, total)
+    
+    def stop(self) -> Optional[float]:
+        """Stop sampling and return the peak in MB (None if unknown)"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            return self.peak / 1024 / 1024
+        if resource is None:
+            return None
+        # ru_maxrss is KB on Linux, bytes on macOS
+        scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return max(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        ) / scale
+
+
+# ================= BENCHMARKS =================
+def bench_engines(args: argparse.Namespace):
+    """Per-job overhead of the subprocess engine vs the in-process engine
+    
+    Each job downloads a tiny file from a local server, so the measured
+    time is almost entirely engine overhead (process start, imports,
+    extractor setup).
+    """
+    engines = ["subprocess"]
+    if yt_dlp is not None:
+        engines.append("inprocess")
+    else:
+        print("⚠️ ไม่พบ yt_dlp module ข้าม in-process engine (pip install yt-dlp)")
+    
+    logger = logging.getLogger("benchmark")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        media_dir = Path(tmp) / "media"
+        media_dir.mkdir()
+        (media_dir / "clip.mp4").write_bytes(os.urandom(args.size))
+        server, base_url = serve_directory(media_dir)
+        
+        try:
+            for engine in engines:
+                config = Config(
+                    YTDLP=find_ytdlp(args.ytdlp),
+                    DOWNLOAD_DIR=Path(tmp) / engine,
+                    ENGINE=engine
+                )
+                downloader = Downloader(config, logger)
+                durations = []
+                
+                for i in range(args.jobs):
+                    cmd = downloader._build_base_command() + [
+                        "-o", str(config.DOWNLOAD_DIR / f"clip_{i}.%(ext)s"),
+                        f"{base_url}/clip.mp4"
+                    ]
+                    monitor = downloader._new_monitor(cmd)
+                    started = time.perf_counter()
+                    returncode = downloader.engine.run(cmd, monitor)
+                    durations.append(time.perf_counter() - started)
+                    if returncode != 0:
+                        print(f"❌ {engine} job {i} ล้มเหลว: {monitor.error_summary()}")
+                
+                summarize(engine, durations)
+        finally:
+            server.shutdown()
+
+
+def bench_throughput(args: argparse.Namespace):
+    """Jobs/sec, latency percentiles, peak memory and CPU of whole batches
+    
+    Runs the same batch through the normal job pool, once with a single
+    worker and once with --workers, against the stub yt-dlp so results do
+    not depend on the network or on YouTube.
+    """
+    os.environ["STUB_SIZE"] = str(args.size)
+    os.environ["STUB_SPEED"] = str(args.speed)
+    os.environ["STUB_FAILURE_RATE"] = str(args.failure_rate)
+    os.environ["STUB_TRANSIENT_RATE"] = str(args.transient_rate)
+    
+    logger = logging.getLogger("benchmark.throughput")
+    logger.setLevel(logging.ERROR)  # failed jobs are expected with --failure-rate/--transient-rate
+    modes = [("sequential", 1), ("concurrent", args.workers)]
+    report = {}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        stub = write_stub_ytdlp(Path(tmp))
+        for name, workers in modes:
+            config = Config(
+                YTDLP=stub,
+                DOWNLOAD_DIR=Path(tmp) / name,
+                MAX_WORKERS=workers,
+                STAGED_PIPELINE=False,
+                RETRY_BACKOFF_BASE=args.retry_backoff
+            )
+            downloader = Downloader(config, logger)
+            jobs = [
+                DownloadJob(
+                    YOUTUBE_WATCH_URL.format(f"bench{i:06d}"),
+                    FileType.MP3,
+                    QualitySettings.get_audio_quality()
+                )
+                for i in range(args.jobs)
+            ]
+            
+            sampler = PeakMemorySampler()
+            sampler.start()
+            cpu_started = time.process_time()
+            started = time.perf_counter()
+            results = DownloadPool(downloader).run(jobs)
+            wall = time.perf_counter() - started
+            own_cpu = time.process_time() - cpu_started
+            peak_rss = sampler.stop()
+            
+            latencies = [r.elapsed for r in results if r.success]
+            child_cpu = sum(r.cpu_time or 0.0 for r in results)
+            row = {
+                "workers": workers,
+                "jobs": len(results),
+                "failed": sum(1 for r in results if not r.success),
+                "retries": sum(max(r.attempts - 1, 0) for r in results),
+                "wall": round(wall, 3),
+                "jobs_per_sec": round(len(results) / wall, 2),
+                "p50": round(percentile(latencies, 50), 3) if latencies else None,
+                "p95": round(percentile(latencies, 95), 3) if latencies else None,
+                "p99": round(percentile(latencies, 99), 3) if latencies else None,
+                "cpu_seconds": round(own_cpu + child_cpu, 2),
+                "peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else None,
+            }
+            report[name] = row
+            if not args.json:
+                print(
+                    f"{name:<11} workers={workers:<3} jobs={row['jobs']:<4} failed={row['failed']:<3} retries={row['retries']:<3} "
+                    f"{row['jobs_per_sec']:6.2f} jobs/s  "
+                    f"p50={row['p50']}s p95={row['p95']}s p99={row['p99']}s  "
+                    f"cpu={row['cpu_seconds']}s  peak_rss={row['peak_rss_mb']}MB"
+                )
+    
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+
+def bench_fragments(args: argparse.Namespace):
+    """Throughput of one fragmented (HLS) download at several -N levels
+    
+    The local server caps every connection at --connection-speed, like a
+    CDN, so a single-connection download is limited by it while parallel
+    fragments add up. Uses the real yt-dlp (binary or module) with the
+    downloader's base command and the --concurrent-fragments option the
+    presets set.
+    """
+    engine = "inprocess" if yt_dlp is not None and not args.ytdlp else "subprocess"
+    logger = logging.getLogger("benchmark")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        media_dir = Path(tmp) / "media"
+        media_dir.mkdir()
+        write_hls_stream(media_dir, args.segments, args.segment_size)
+        server, base_url = serve_directory(media_dir, ThrottledHandler)
+        server.connection_speed = args.connection_speed
+        server.latency = args.latency
+        total = args.segments * args.segment_size
+        
+        try:
+            baseline = None
+            for fragments in args.levels:
+                config = Config(
+                    YTDLP=find_ytdlp(args.ytdlp) if engine == "subprocess" else Config.YTDLP,
+                    DOWNLOAD_DIR=Path(tmp) / f"n{fragments}",
+                    ENGINE=engine,
+                    CONCURRENT_FRAGMENTS=fragments
+                )
+                downloader = Downloader(config, logger)
+                cmd = downloader._build_base_command() + downloader._fragment_args(FileType.MP4, "b") + [
+                    "-f", "b",
+                    "--fixup", "never",
+                    "-o", str(config.DOWNLOAD_DIR / "stream.%(ext)s"),
+                    f"{base_url}/stream.m3u8"
+                ]
+                monitor = downloader._new_monitor(cmd)
+                started = time.perf_counter()
+                returncode = downloader.engine.run(cmd, monitor)
+                elapsed = time.perf_counter() - started
+                if returncode != 0:
+                    print(f"❌ -N {fragments} ล้มเหลว: {monitor.error_summary()}")
+                    continue
+                
+                rate = total / elapsed / 1024 / 1024
+                baseline = baseline or rate
+                print(f"-N {fragments:<3} {elapsed:7.2f}s {rate:8.2f}MiB/s  x{rate / baseline:.2f}")
+        finally:
+            server.shutdown()
+
+
+# ================= ENTRY POINT =================
+def main():
+    """Benchmark entry point"""
+    parser = argparse.ArgumentParser(description="Downloader benchmarks (offline)")
+    parser.add_argument("--ytdlp", default="", help="yt-dlp binary (default: Config.YTDLP or PATH)")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    
+    engines = subparsers.add_parser("engines", help="per-job overhead: subprocess vs in-process")
+    engines.add_argument("--jobs", type=int, default=10)
+    engines.add_argument("--size", type=int, default=64 * 1024, help="bytes per file")
+    engines.set_defaults(func=bench_engines)
+    
+    throughput = subparsers.add_parser("throughput", help="batch throughput: sequential vs concurrent (stub yt-dlp)")
+    throughput.add_argument("--jobs", type=int, default=40)
+    throughput.add_argument("--workers", type=int, default=Config.MAX_WORKERS, help="workers for the concurrent run")
+    throughput.add_argument("--size", type=int, default=2 * 1024 * 1024, help="bytes per file")
+    throughput.add_argument("--speed", type=float, default=10 * 1024 * 1024, help="bytes/sec per job, 0 = unlimited")
+    throughput.add_argument("--failure-rate", type=float, default=0.0, help="fraction of attempts that fail permanently mid-download")
+    throughput.add_argument("--transient-rate", type=float, default=0.0, help="fraction of attempts that fail with a connection reset (retried)")
+    throughput.add_argument("--retry-backoff", type=float, default=0.2, help="seconds before the first retry")
+    throughput.add_argument("--json", action="store_true", help="print the results as JSON")
+    throughput.set_defaults(func=bench_throughput)
+    
+    fragments = subparsers.add_parser("fragments", help="HLS download speed at several --concurrent-fragments levels")
+    fragments.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8])
+    fragments.add_argument("--segments", type=int, default=40)
+    fragments.add_argument("--segment-size", type=int, default=256 * 1024, help="bytes per segment")
+    fragments.add_argument("--connection-speed", type=float, default=2 * 1024 * 1024, help="bytes/sec per connection")
+    fragments.add_argument("--latency", type=float, default=0.05, help="seconds before each response")
+    fragments.set_defaults(func=bench_fragments)
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Local HTTP stand-in for the Spotify Web API and YouTube search"""
+
+import json
+import threading
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+TOKEN = "test-token"
+
+
+def track(track_id: str, title: str, duration: float, artist: str = "ศิลปิน") -> dict:
+    """Track object in the shape the API returns"""
+    return {
+        "id": track_id,
+        "type": "track",
+        "name": title,
+        "artists": [{"name": artist}],
+        "duration_ms": int(duration * 1000),
+    }
+
+
+def track_id(number: int) -> str:
+    """A valid 22-character Spotify id"""
+    return f"{number:022d}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.record(self.path)
+        if self.path != "/token":
+            return self._send(404, {"error": "not found"})
+        self._send(200, {"access_token": TOKEN, "expires_in": 3600})
+    
+    def do_GET(self):
+        self.server.record(self.path)
+        url = urllib.parse.urlparse(self.path)
+        params = urllib.parse.parse_qs(url.query)
+        
+        if url.path in self.server.failures:
+            return self._send(self.server.failures[url.path], {"error": "stubbed failure"})
+        if url.path == "/search":
+            return self._send(200, self.server.search_results.get(params["q"][0], []))
+        if self.headers.get("Authorization") != f"Bearer {TOKEN}":
+            return self._send(401, {"error": "no token"})
+        if url.path == "/v1/tracks":
+            ids = params["ids"][0].split(",")
+            return self._send(200, {"tracks": [self.server.tracks.get(i) for i in ids]})
+        if url.path.endswith("/tracks") and url.path[len("/v1/"):-len("/tracks")] in self.server.collections:
+            return self._send(200, self._page(url.path, params))
+        self._send(404, {"error": "not found"})
+    
+    def _page(self, path: str, params: dict) -> dict:
+        """One page of a playlist/album, with a `next` link like the API's"""
+        items = self.server.collections[path[len("/v1/"):-len("/tracks")]]
+        offset = int(params.get("offset", ["0"])[0])
+        limit = int(params["limit"][0])
+        next_url = None
+        if offset + limit < len(items):
+            query = urllib.parse.urlencode({"offset": offset + limit, "limit": limit})
+            next_url = f"{self.server.url}{path}?{query}"
+        return {"items": items[offset:offset + limit], "next": next_url, "total": len(items)}
+    
+    def _send(self, code: int, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class SpotifyStub(ThreadingHTTPServer):
+    """Serves /token, /v1/tracks, playlist/album pages and /search from fixtures
+    
+    `collections` maps "playlists/<id>" or "albums/<id>" to the raw page
+    items, in the shape the API uses for that kind.
+    Every request path is recorded in `requests`; a path listed in
+    `failures` answers with that HTTP status instead.
+    """
+    
+    daemon_threads = True
+    
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.tracks: Dict[str, dict] = {}
+        self.collections: Dict[str, List[dict]] = {}
+        self.search_results: Dict[str, List[dict]] = {}  # query -> YouTube candidates
+        self.failures: Dict[str, int] = {}
+        self.requests: List[str] = []
+        self._lock = threading.Lock()
+        # Short poll so stop() returns quickly
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+    
+    def record(self, path: str):
+        with self._lock:
+            self.requests.append(path)
+    
+    def paths(self, prefix: str) -> List[str]:
+        """Recorded request paths starting with prefix"""
+        with self._lock:
+            return [path for path in self.requests if path.startswith(prefix)]
+    
+    def search(self, query: str) -> List[dict]:
+        """Search callable for SpotifyResolver, answered by /search"""
+        url = f"{self.url}/search?" + urllib.parse.urlencode({"q": query})
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return json.loads(response.read().decode("utf-8"))
+    
+    def stop(self):
+        self.shutdown()
+        self.server_close()
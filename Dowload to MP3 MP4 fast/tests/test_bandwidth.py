@@ -0,0 +1,147 @@
+"""Share redistribution in BandwidthLimiter and the throttling proxy"""
+
+import base64
+import logging
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import playlis  # noqa: E402
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class BandwidthLimiterTest(unittest.TestCase):
+    
+    RATE = 10000  # bytes/sec
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.config = playlis.Config(DOWNLOAD_DIR=Path(tmp.name), BANDWIDTH_LIMIT=self.RATE)
+        self.limiter = playlis.BandwidthLimiter(self.config, logging.getLogger("bandwidth-test"))
+    
+    def timed_consume(self, key: str, count: int) -> float:
+        started = time.monotonic()
+        self.limiter.consume(key, count)
+        return time.monotonic() - started
+    
+    def test_share_is_split_and_returned(self):
+        self.limiter.open("a")
+        self.limiter.open("b")
+        
+        # Half the rate each: 1000 bytes take about 0.2s
+        self.assertGreaterEqual(self.timed_consume("a", 1000), 0.15)
+        
+        self.limiter.close("b")
+        self.assertEqual(self.limiter.active_jobs(), 1)
+        # b's share went back to a: the same bytes take about 0.1s
+        self.assertLess(self.timed_consume("a", 1000), 0.15)
+    
+    def test_share_is_held_until_the_last_connection_closes(self):
+        self.limiter.open("a")
+        self.limiter.open("a")
+        self.limiter.open("b")
+        
+        self.limiter.close("a")
+        
+        self.assertEqual(self.limiter.active_jobs(), 2)
+        self.limiter.close("a")
+        self.assertEqual(self.limiter.active_jobs(), 1)
+    
+    def test_waiting_job_speeds_up_when_another_finishes(self):
+        self.limiter.open("a")
+        self.limiter.open("b")
+        threading.Timer(0.05, self.limiter.close, ("b",)).start()
+        
+        # 2000 bytes: 0.4s at half the rate, about 0.2s once b is gone
+        self.assertLess(self.timed_consume("a", 2000), 0.3)
+    
+    def test_control_file_changes_the_rate(self):
+        (self.config.DOWNLOAD_DIR / self.config.BANDWIDTH_FILE_NAME).write_text("2M\n", encoding="utf-8")
+        
+        limiter = playlis.BandwidthLimiter(self.config, logging.getLogger("bandwidth-test"))
+        
+        self.assertEqual(limiter.rate, 2 * 1024 * 1024)
+
+
+class ThrottlingProxyTest(unittest.TestCase):
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        (root / "clip.bin").write_bytes(b"x" * 4096)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(root)))
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.origin = f"127.0.0.1:{server.server_address[1]}"
+        
+        logger = logging.getLogger("proxy-test")
+        limiter = playlis.BandwidthLimiter(playlis.Config(DOWNLOAD_DIR=root), logger)
+        self.proxy = playlis.ThrottlingProxy(limiter, logger, upstream_timeout=5)
+        self.addCleanup(self.proxy.server_close)
+        self.addCleanup(self.proxy.shutdown)
+    
+    def send(self, request_line: str, credentials: str = None) -> bytes:
+        """Send one request through the proxy and return the whole reply"""
+        lines = [request_line, f"Host: {self.origin}"]
+        if credentials is not None:
+            lines.append("Proxy-Authorization: Basic " + base64.b64encode(credentials.encode()).decode())
+        with socket.create_connection(self.proxy.server_address, timeout=5) as conn:
+            conn.sendall(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+            if request_line.startswith("CONNECT"):
+                return conn.recv(1024)
+            reply = b""
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    return reply
+                reply += data
+    
+    def test_request_with_the_run_token_is_relayed(self):
+        reply = self.send(f"GET http://{self.origin}/clip.bin HTTP/1.1", f"job1:{self.proxy.token}")
+        
+        self.assertTrue(reply.startswith(b"HTTP/1.0 200"), reply[:40])
+        self.assertTrue(reply.endswith(b"x" * 4096))
+    
+    def test_proxy_url_carries_the_token(self):
+        url = playlis.urllib.parse.urlsplit(self.proxy.proxy_url("job1"))
+        
+        self.assertEqual((url.username, url.password, url.port), ("job1", self.proxy.token, self.proxy.server_address[1]))
+    
+    def test_requests_without_the_token_are_refused(self):
+        cases = {
+            "no credentials": None,
+            "wrong token": "job1:x",
+            "no job key": f":{self.proxy.token}",
+        }
+        for name, credentials in cases.items():
+            for request_line in (f"GET http://{self.origin}/clip.bin HTTP/1.1", f"CONNECT {self.origin} HTTP/1.1"):
+                with self.subTest(name, request=request_line.split()[0]):
+                    reply = self.send(request_line, credentials)
+                    self.assertTrue(reply.startswith(b"HTTP/1.1 407"), reply[:40])
+    
+    def test_each_run_has_its_own_token(self):
+        other = playlis.ThrottlingProxy(self.proxy.limiter, self.proxy.logger, upstream_timeout=5)
+        self.addCleanup(other.server_close)
+        self.addCleanup(other.shutdown)
+        
+        self.assertNotEqual(other.token, self.proxy.token)
+
+
+if __name__ == "__main__":
+    unittest.main()
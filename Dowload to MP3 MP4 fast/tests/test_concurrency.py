@@ -0,0 +1,161 @@
+"""AIMD transitions of ConcurrencyController"""
+
+import logging
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import playlis  # noqa: E402
+
+MIB = 1024 * 1024
+
+
+class FakeDownloader:
+    """Just the counters the controller reads"""
+    
+    def __init__(self, config: playlis.Config):
+        self.config = config
+        self.logger = logging.getLogger("concurrency-test")
+        self.stats = {"bytes": 0, "rate_limited_errors": 0, "timeouts": 0}
+    
+    def get_stats(self) -> dict:
+        return dict(self.stats)
+
+
+class ScriptedTicks:
+    """Stands in for the controller's stop event: every wait() is one tick
+    
+    Each tick moves the fake clock and applies the next scripted step.
+    """
+    
+    def __init__(self, steps):
+        self.now = 0.0
+        self.steps = list(steps)
+    
+    def monotonic(self) -> float:
+        return self.now
+    
+    def wait(self, timeout: float) -> bool:
+        if not self.steps:
+            return True
+        self.now += timeout
+        self.steps.pop(0)()
+        return False
+
+
+class ControllerTest(unittest.TestCase):
+    
+    INTERVAL = 2  # ticks per evaluation
+    
+    def controller(self, initial: int, maximum: int = 16) -> playlis.ConcurrencyController:
+        config = playlis.Config(
+            ADAPTIVE_MIN_WORKERS=1,
+            ADAPTIVE_MAX_WORKERS=maximum,
+            ADAPTIVE_INTERVAL=self.INTERVAL * playlis.ConcurrencyController.TICK_SECONDS
+        )
+        self.downloader = FakeDownloader(config)
+        self.history = []
+        return playlis.ConcurrencyController(self.downloader, initial)
+    
+    def tick(self, controller, rate: float = 0, throttled: int = 0, timeouts: int = 0, busy: bool = True):
+        """One second of transfer at a rate, with every slot busy unless told otherwise"""
+        def step():
+            self.history.append(controller.limit)
+            stats = self.downloader.stats
+            stats["bytes"] += int(rate * controller.TICK_SECONDS)
+            stats["rate_limited_errors"] += throttled
+            stats["timeouts"] += timeouts
+            controller.active = controller.limit if busy else 0
+        return step
+    
+    def intervals(self, controller, *rates, busy: bool = True) -> list:
+        """One evaluation interval per rate"""
+        return [self.tick(controller, rate, busy=busy) for rate in rates for _ in range(self.INTERVAL)]
+    
+    def run_script(self, controller, steps) -> list:
+        """Run the controller loop over the steps; the limit after each evaluation"""
+        clock = ScriptedTicks(steps)
+        controller._stop = clock
+        with mock.patch.object(playlis.time, "monotonic", clock.monotonic):
+            controller._run()
+        return self.history[1:] + [controller.limit]
+    
+    def test_rising_throughput_adds_one_slot_per_interval(self):
+        controller = self.controller(2)
+        
+        limits = self.run_script(controller, self.intervals(controller, 1 * MIB, 2 * MIB, 3 * MIB))
+        
+        self.assertEqual(limits[1::self.INTERVAL], [3, 4, 5])
+        self.assertEqual(controller.change_counts(), {"throughput_gain": 3})
+    
+    def test_increase_that_hurts_is_taken_back(self):
+        controller = self.controller(2)
+        
+        self.run_script(controller, self.intervals(controller, 2 * MIB, 1 * MIB))
+        
+        self.assertEqual(controller.limit, 2)
+        self.assertEqual(controller.change_counts(), {"throughput_gain": 1, "throughput_loss": 1})
+    
+    def test_flat_throughput_probes_one_more_slot(self):
+        controller = self.controller(2)
+        rates = [1 * MIB] * (1 + controller.PROBE_AFTER)
+        
+        limits = self.run_script(controller, self.intervals(controller, *rates))
+        
+        self.assertEqual(limits[1::self.INTERVAL], [3, 3, 3, 3, 4])
+        self.assertEqual(controller.change_counts(), {"throughput_gain": 1, "probe": 1})
+    
+    def test_rate_limiting_halves_once_per_interval(self):
+        controller = self.controller(8)
+        
+        self.run_script(controller, [
+            self.tick(controller, throttled=1),
+            self.tick(controller, throttled=2),  # same interval: ignored
+            self.tick(controller, timeouts=1),
+        ])
+        
+        self.assertEqual(self.history[1:] + [controller.limit], [4, 4, 2])
+        self.assertEqual(controller.change_counts(), {"rate_limited": 1, "timeout": 1})
+    
+    def test_decrease_stops_at_the_minimum(self):
+        controller = self.controller(1)
+        
+        self.run_script(controller, [self.tick(controller, throttled=1)])
+        
+        self.assertEqual(controller.limit, 1)
+        self.assertEqual(controller.change_counts(), {})
+    
+    def test_idle_slots_teach_nothing(self):
+        controller = self.controller(4)
+        
+        self.run_script(controller, self.intervals(controller, 1 * MIB, 3 * MIB, 9 * MIB, busy=False))
+        
+        self.assertEqual(controller.limit, 4)
+    
+    def test_growth_stops_at_the_maximum(self):
+        controller = self.controller(3, maximum=4)
+        
+        self.run_script(controller, self.intervals(controller, 1 * MIB, 2 * MIB, 4 * MIB))
+        
+        self.assertEqual(controller.limit, 4)
+    
+    def test_acquire_waits_for_a_free_slot(self):
+        controller = self.controller(1)
+        controller.acquire()
+        second = threading.Thread(target=controller.acquire)
+        second.start()
+        
+        second.join(0.1)
+        self.assertTrue(second.is_alive())
+        controller.release()
+        second.join(1)
+        self.assertFalse(second.is_alive())
+        self.assertEqual(controller.active, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
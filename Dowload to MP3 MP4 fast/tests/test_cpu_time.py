@@ -0,0 +1,60 @@
+"""Per-job CPU time of yt-dlp processes"""
+
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import playlis  # noqa: E402
+
+# Burns about 0.3 CPU seconds, then exits with code 3
+BUSY = "import time\nend = time.process_time() + 0.3\nwhile time.process_time() < end: pass\nraise SystemExit(3)"
+
+
+class CpuTimeTest(unittest.TestCase):
+    
+    def busy_process(self) -> subprocess.Popen:
+        return subprocess.Popen([sys.executable, "-c", BUSY])
+    
+    def without_wait4(self):
+        """Pose as Windows for the rest of the test"""
+        wait4 = getattr(os, "wait4", None)
+        if wait4 is not None:
+            del os.wait4
+            self.addCleanup(setattr, os, "wait4", wait4)
+    
+    @unittest.skipUnless(hasattr(os, "wait4"), "needs os.wait4")
+    def test_wait4_reaps_and_measures(self):
+        process = self.busy_process()
+        
+        cpu = playlis.wait_for_cpu_time(process)
+        
+        self.assertEqual(process.returncode, 3)
+        self.assertGreaterEqual(cpu, 0.25)
+    
+    def test_without_wait4_or_psutil_only_reaps(self):
+        self.without_wait4()
+        process = self.busy_process()
+        
+        self.assertIsNone(playlis.wait_for_cpu_time(process, sampler=None))
+        self.assertEqual(process.returncode, 3)
+    
+    @unittest.skipIf(playlis.psutil is None, "psutil is not installed")
+    def test_sampler_covers_platforms_without_wait4(self):
+        self.without_wait4()
+        process = self.busy_process()
+        sampler = playlis.CpuSampler.start(process)
+        
+        cpu = playlis.wait_for_cpu_time(process, sampler)
+        
+        self.assertEqual(process.returncode, 3)
+        # Sampled, so the tail after the last reading may be missed
+        self.assertGreater(cpu, 0)
+        self.assertLessEqual(cpu, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
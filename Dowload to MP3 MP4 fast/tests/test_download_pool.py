@@ -0,0 +1,98 @@
+"""Archive pre-check and cancelling in DownloadPool"""
+
+import logging
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import playlis  # noqa: E402
+
+
+def job(name: str) -> playlis.DownloadJob:
+    return playlis.DownloadJob(query=f"ytsearch1:{name}", file_type=playlis.FileType.MP3, quality="320")
+
+
+class CancelTest(unittest.TestCase):
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        config = playlis.Config(DOWNLOAD_DIR=Path(tmp.name))
+        self.downloader = playlis.Downloader(config, logging.getLogger("pool-test"))
+        self.addCleanup(self.downloader.jobs._conn.close)
+        self.started = []
+        self.running = threading.Event()
+        self.downloader.run_job = self.slow_job
+    
+    def slow_job(self, item: playlis.DownloadJob) -> playlis.DownloadResult:
+        """A job that runs until the batch is cancelled"""
+        self.started.append(item)
+        self.running.set()
+        cancelled = self.downloader.cancelled.wait(10)
+        return playlis.DownloadResult(job=item, success=not cancelled)
+    
+    def interrupted_input(self):
+        yield from (job("one"), job("two"))
+        self.running.wait(5)
+        raise KeyboardInterrupt
+    
+    def test_interrupt_stops_running_and_queued_jobs(self):
+        pool = playlis.DownloadPool(self.downloader, workers=1, queue_size=2)
+        
+        started = time.monotonic()
+        with self.assertRaises(KeyboardInterrupt):
+            pool.run(self.interrupted_input())
+        
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(self.started, [job("one")])
+        # Both rows stay unfinished, so the next run resumes them
+        self.assertEqual(self.downloader.jobs.depth(), {"pending": 0, "running": 2})
+    
+    def test_next_batch_runs_after_a_cancel(self):
+        self.downloader.cancelled.set()
+        self.downloader.run_job = lambda item: playlis.DownloadResult(job=item, success=True)
+        
+        results = playlis.DownloadPool(self.downloader, workers=1).run([job("one")])
+        
+        self.assertEqual([r.success for r in results], [True])
+
+
+
+class ArchivedJobsTest(unittest.TestCase):
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        config = playlis.Config(DOWNLOAD_DIR=Path(tmp.name))
+        self.downloader = playlis.Downloader(config, logging.getLogger("pool-test"))
+        self.addCleanup(self.downloader.jobs._conn.close)
+        self.ran = []
+        self.downloader.run_job = lambda item: self.ran.append(item) or playlis.DownloadResult(job=item, success=True)
+    
+    def archive(self, item: playlis.DownloadJob, video_id: str):
+        self.downloader.archive.add(item, {"id": video_id, "extractor_key": "Youtube"})
+    
+    def test_archived_jobs_are_skipped_before_queueing(self):
+        link = playlis.DownloadJob("https://www.youtube.com/watch?v=abcdefghij1", playlis.FileType.MP3, "320")
+        search = job("cached song")
+        self.archive(link, "abcdefghij1")
+        self.archive(link, "abcdefghij2")
+        self.downloader.search_cache.put("cached song", "abcdefghij2")
+        
+        results = playlis.DownloadPool(self.downloader, workers=1).run([link, job("new song"), search])
+        
+        self.assertEqual([r.skipped for r in results], [True, False, True])
+        self.assertEqual(self.ran, [job("new song")])
+        self.assertEqual(self.downloader.jobs.stats()["total"], 1)
+        history = self.downloader.history.query(limit=10)
+        self.assertEqual(sorted(row["query"] for row in history if row["skipped"]), [link.query, search.query])
+        self.assertEqual(self.downloader.get_stats()["search_cache_hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
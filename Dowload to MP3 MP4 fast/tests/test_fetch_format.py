@@ -0,0 +1,47 @@
+"""Format selection for the fetch stage of the staged pipeline"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import playlis  # noqa: E402
+
+
+class FetchFormatTest(unittest.TestCase):
+    
+    def test_presets_keep_their_fallback(self):
+        formats = {
+            choice: playlis.QualitySettings.get_fetch_format(preset["format"])
+            for choice, preset in playlis.QualitySettings.VIDEO_QUALITIES.items()
+        }
+        self.assertEqual(formats, {
+            "1": "(bv*,ba)/b",
+            "2": "(bv*[height<=1080],ba)/b",
+            "3": "(bv*[height<=720],ba)/b",
+            "4": "(bv*[height<=480],ba)/b",
+        })
+    
+    def test_every_merge_alternative_is_grouped(self):
+        self.assertEqual(
+            playlis.QualitySettings.get_fetch_format("bv*[ext=mp4]+ba[ext=m4a]/bv*+ba/b"),
+            "(bv*[ext=mp4],ba[ext=m4a])/(bv*,ba)/b"
+        )
+    
+    def test_single_formats_are_unchanged(self):
+        self.assertEqual(playlis.QualitySettings.get_fetch_format("b"), "b")
+        self.assertEqual(playlis.QualitySettings.get_fetch_format("22/18"), "22/18")
+    
+    def test_selector_parses(self):
+        try:
+            import yt_dlp
+        except ImportError:
+            self.skipTest("yt_dlp is not installed")
+        ydl = yt_dlp.YoutubeDL({"quiet": True})
+        for preset in playlis.QualitySettings.VIDEO_QUALITIES.values():
+            ydl.build_format_selector(playlis.QualitySettings.get_fetch_format(preset["format"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
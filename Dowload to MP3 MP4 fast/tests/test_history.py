@@ -0,0 +1,119 @@
+"""History queries and the `history` command line filters"""
+
+import argparse
+import io
+import json
+import logging
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import playlis  # noqa: E402
+
+
+def stamp(day: str, hour: int = 12) -> float:
+    return datetime.strptime(day, "%Y-%m-%d").replace(hour=hour).timestamp()
+
+
+class HistoryTest(unittest.TestCase):
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.history = playlis.DownloadHistory(playlis.Config(DOWNLOAD_DIR=self.dir), logging.getLogger("history-test"))
+        self.addCleanup(self.history._conn.close)
+        self.add("2024-03-01", "Bodyslam", "ความเชื่อ")
+        self.add("2024-03-02", "bodyslam", "คิดฮอด", error_class=playlis.ErrorClass.PERMANENT)
+        self.add("2024-03-03", "Body Count", "Cop Killer", error_class=playlis.ErrorClass.TRANSIENT)
+        self.add("2024-03-04", "ป้างนครินทร์", "ยิ่งรู้ยิ่งไม่เข้าใจ", stages={"transfer": 1.5, "extract": 0.25})
+    
+    def add(self, day: str, artist: str, title: str, error_class: playlis.ErrorClass = None, stages: dict = None):
+        """Record one outcome finished at noon on a given day"""
+        job = playlis.DownloadJob(f"ytsearch1:{artist} {title}", playlis.FileType.MP3, "320")
+        result = playlis.DownloadResult(
+            job=job,
+            success=error_class is None,
+            error_class=error_class,
+            error="ERROR: Video unavailable" if error_class else None,
+            attempts=1,
+            metadata={"artist": artist, "title": title},
+            stages=stages or {}
+        )
+        self.history.record(job, job, result)
+        self.history._conn.execute("UPDATE history SET finished = ? WHERE id = last_insert_rowid()", (stamp(day),))
+    
+    def titles(self, **filters) -> list:
+        return [entry["title"] for entry in self.history.query(**filters)]
+    
+    def test_newest_first_with_limit(self):
+        self.assertEqual(self.titles(limit=2), ["ยิ่งรู้ยิ่งไม่เข้าใจ", "Cop Killer"])
+    
+    def test_artist_is_a_case_insensitive_prefix(self):
+        self.assertEqual(self.titles(artist="BODYSLAM"), ["คิดฮอด", "ความเชื่อ"])
+        self.assertEqual(self.titles(artist="body"), ["Cop Killer", "คิดฮอด", "ความเชื่อ"])
+        self.assertEqual(self.titles(artist="ป้าง"), ["ยิ่งรู้ยิ่งไม่เข้าใจ"])
+    
+    def test_failure_filters(self):
+        self.assertEqual(self.titles(failed=True), ["Cop Killer", "คิดฮอด"])
+        self.assertEqual(self.titles(error_class="permanent"), ["คิดฮอด"])
+    
+    def test_time_range(self):
+        self.assertEqual(self.titles(since=stamp("2024-03-02", 0), until=stamp("2024-03-04", 0)), ["Cop Killer", "คิดฮอด"])
+    
+    def test_stages_are_decoded(self):
+        latest = self.history.query(limit=1)[0]
+        
+        self.assertEqual(latest["stages"], {"extract": 0.25, "transfer": 1.5})
+        self.assertEqual(self.history.query(artist="Body Count")[0]["stages"], {})
+    
+    def run_cli(self, *argv) -> list:
+        """Run `playlis.py history --json` and return the printed entries"""
+        args = playlis.build_history_parser().parse_args(["--output", str(self.dir), "--json", *argv])
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.assertEqual(playlis.show_history(args), 0)
+        return [json.loads(line)["title"] for line in out.getvalue().splitlines()]
+    
+    def test_cli_until_includes_the_whole_day(self):
+        self.assertEqual(self.run_cli("--since", "2024-03-02", "--until", "2024-03-03"), ["Cop Killer", "คิดฮอด"])
+    
+    def test_cli_filters(self):
+        self.assertEqual(self.run_cli("--artist", "bodyslam", "--failed"), ["คิดฮอด"])
+        self.assertEqual(self.run_cli("--error-class", "transient"), ["Cop Killer"])
+        self.assertEqual(self.run_cli("--limit", "1"), ["ยิ่งรู้ยิ่งไม่เข้าใจ"])
+    
+    def test_cli_text_output(self):
+        args = playlis.build_history_parser().parse_args(["--output", str(self.dir), "--error-class", "permanent"])
+        out = io.StringIO()
+        with redirect_stdout(out):
+            playlis.show_history(args)
+        
+        first, second = out.getvalue().splitlines()
+        self.assertIn("❌ permanent", first)
+        self.assertIn("bodyslam - คิดฮอด", first)
+        self.assertEqual(second.strip(), "ERROR: Video unavailable")
+    
+    def test_cli_without_history(self):
+        with tempfile.TemporaryDirectory() as empty:
+            args = playlis.build_history_parser().parse_args(["--output", empty])
+            err = io.StringIO()
+            with redirect_stderr(err):
+                self.assertEqual(playlis.show_history(args), 0)
+        self.assertTrue(err.getvalue())
+    
+    def test_cli_rejects_bad_dates_and_classes(self):
+        self.assertRaises(argparse.ArgumentTypeError, playlis.parse_date, "03/01/2024")
+        for argv in (["--since", "2024-13-01"], ["--error-class", "network"]):
+            with self.subTest(argv=argv), redirect_stderr(io.StringIO()):
+                with self.assertRaises(SystemExit):
+                    playlis.build_history_parser().parse_args(argv)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+"""Leases, recovery and the attempts cap in JobQueue"""
+
+import logging
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import playlis  # noqa: E402
+
+
+def job(name: str) -> playlis.DownloadJob:
+    return playlis.DownloadJob(query=f"ytsearch1:{name}", file_type=playlis.FileType.MP3, quality="320")
+
+
+def result(item: playlis.DownloadJob, success: bool = True) -> playlis.DownloadResult:
+    return playlis.DownloadResult(job=item, success=success, elapsed=1.0)
+
+
+class JobQueueTest(unittest.TestCase):
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.config = playlis.Config(DOWNLOAD_DIR=Path(tmp.name))
+        self.logger = logging.getLogger("job-queue-test")
+    
+    def open_queue(self, owner: str = None, **overrides) -> playlis.JobQueue:
+        """A queue on the shared database, optionally posing as another process"""
+        config = self.config
+        if overrides:
+            config = playlis.Config(DOWNLOAD_DIR=self.config.DOWNLOAD_DIR, **overrides)
+        jobs = playlis.JobQueue(config, self.logger)
+        self.addCleanup(jobs._conn.close)
+        if owner is not None:
+            jobs.owner = owner
+        return jobs
+    
+    def row(self, jobs: playlis.JobQueue, row_id: int) -> tuple:
+        return jobs._conn.execute(
+            "SELECT state, attempts, lease_owner FROM jobs WHERE id = ?", (row_id,)
+        ).fetchone()
+    
+    def test_jobs_are_claimed_in_order_and_finished(self):
+        jobs = self.open_queue()
+        first, second = job("one"), job("two")
+        ids = jobs.add([first, second, first])
+        
+        self.assertEqual(ids[0], ids[2])
+        claimed = jobs.claim()
+        self.assertEqual(claimed, (ids[0], first))
+        jobs.finish(ids[0], result(first))
+        self.assertEqual(jobs.claim(), (ids[1], second))
+        jobs.finish(ids[1], result(second, success=False))
+        self.assertIsNone(jobs.claim())
+        
+        stats = jobs.stats()
+        self.assertEqual((stats["success"], stats["failed"], stats["pending"]), (1, 1, 0))
+    
+    def test_finished_job_is_queued_again(self):
+        jobs = self.open_queue()
+        (row_id,) = jobs.add([job("one")])
+        jobs.claim()
+        jobs.finish(row_id, result(job("one")))
+        
+        self.assertEqual(jobs.add([job("one")]), [row_id])
+        self.assertEqual(self.row(jobs, row_id)[:2], ("pending", 0))
+    
+    def test_pending_jobs_of_a_live_process_are_left_alone(self):
+        other = self.open_queue(owner="otherhost:1")
+        other.add([job("theirs")])
+        mine = self.open_queue()
+        (own,) = mine.add([job("mine")])
+        
+        self.assertEqual(mine.claim()[0], own)
+        self.assertIsNone(mine.claim())
+        self.assertEqual(mine.unfinished(), 1)
+        self.assertEqual(mine.depth(), {"pending": 1, "running": 1})
+    
+    def test_running_job_of_a_live_process_is_left_alone(self):
+        other = self.open_queue(owner="otherhost:1")
+        other.add([job("theirs")])
+        other.claim()
+        mine = self.open_queue()
+        
+        self.assertEqual(mine.add([job("theirs")]), [1])
+        self.assertEqual(self.row(mine, 1), ("running", 1, "otherhost:1"))
+        self.assertIsNone(mine.claim())
+    
+    def test_expired_leases_are_claimed(self):
+        other = self.open_queue(owner="otherhost:1", JOB_LEASE_SECONDS=-1)
+        waiting, running = other.add([job("waiting"), job("running")])
+        other._conn.execute("UPDATE jobs SET state = 'running', attempts = 1 WHERE id = ?", (running,))
+        mine = self.open_queue()
+        
+        claimed = {mine.claim()[0], mine.claim()[0]}
+        
+        self.assertEqual(claimed, {waiting, running})
+        self.assertEqual(self.row(mine, running), ("running", 2, mine.owner))
+        # The other process lost its lease, so its result is not recorded
+        other.finish(running, result(job("running")))
+        self.assertEqual(self.row(mine, running)[0], "running")
+    
+    def test_renew_keeps_queued_jobs_leased(self):
+        other = self.open_queue(owner="otherhost:1", JOB_LEASE_SECONDS=0.2)
+        other.add([job("theirs")])
+        mine = self.open_queue()
+        
+        time.sleep(0.3)
+        other.config.JOB_LEASE_SECONDS = 60
+        other.renew()
+        
+        self.assertIsNone(mine.claim())
+    
+    def test_recover_releases_jobs_of_dead_local_process(self):
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        dead = f"{socket.gethostname()}:{process.pid}"
+        other = self.open_queue(owner=dead)
+        started, queued = other.add([job("started"), job("queued")])
+        other.claim()
+        
+        mine = self.open_queue()
+        
+        self.assertEqual(self.row(mine, started), ("pending", 1, None))
+        self.assertEqual(self.row(mine, queued), ("pending", 0, None))
+        self.assertEqual(mine.unfinished(), 2)
+        self.assertEqual({mine.claim()[0], mine.claim()[0]}, {started, queued})
+    
+    def test_job_that_keeps_dying_is_failed(self):
+        other = self.open_queue(owner="otherhost:1", JOB_LEASE_SECONDS=-1)
+        (row_id,) = other.add([job("crashes")])
+        for _ in range(self.config.MAX_RETRIES):
+            self.assertEqual(other.claim()[0], row_id)
+        
+        mine = self.open_queue()
+        
+        self.assertIsNone(mine.claim())
+        state, attempts, owner = self.row(mine, row_id)
+        self.assertEqual((state, attempts, owner), ("failed", self.config.MAX_RETRIES, None))
+        self.assertEqual(mine.stats()["permanent_errors"], 1)
+    
+    def test_cancel_drops_only_resumable_jobs(self):
+        other = self.open_queue(owner="otherhost:1")
+        other.add([job("theirs")])
+        mine = self.open_queue()
+        mine.add([job("mine")])
+        
+        mine.cancel_unfinished()
+        
+        self.assertEqual(mine.unfinished(), 0)
+        self.assertEqual(mine.depth()["pending"], 1)
+    
+    def test_repeat_finished_in_this_batch_is_kept(self):
+        jobs = self.open_queue()
+        started = time.time()
+        (row_id,) = jobs.add([job("one")], since=started)
+        jobs.claim()
+        jobs.finish(row_id, result(job("one"), success=False))
+        
+        self.assertEqual(jobs.add([job("one")], since=started), [row_id])
+        self.assertIsNone(jobs.claim())
+        outcome = jobs.outcome(row_id)
+        self.assertFalse(outcome.success)
+        self.assertEqual(outcome.job, job("one"))
+
+
+class ResultRouterTest(unittest.TestCase):
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.jobs = playlis.JobQueue(playlis.Config(DOWNLOAD_DIR=Path(tmp.name)), logging.getLogger("router-test"))
+        self.addCleanup(self.jobs._conn.close)
+        self.results = {}
+        self.leftovers = []
+        self.router = playlis.ResultRouter(self.results.__setitem__, self.leftovers.append)
+    
+    def test_results_reach_every_waiting_position(self):
+        self.router.expect(1, 0, job("one"))
+        self.router.expect(2, 1, job("two"))
+        self.router.expect(1, 2, job("one"))
+        
+        self.router.deliver(1, result(job("one")))
+        self.router.deliver(3, result(job("old")))
+        
+        self.assertEqual(sorted(self.results), [0, 2])
+        self.assertEqual([r.job for r in self.leftovers], [job("old")])
+        self.assertEqual(self.router._waiting, {2: [(1, job("two"))]})
+    
+    def test_close_settles_rows_run_elsewhere(self):
+        (done, held) = self.jobs.add([job("done"), job("held")])
+        self.jobs.claim()
+        self.jobs.finish(done, result(job("done")))
+        self.router.expect(done, 0, job("done"))
+        self.router.expect(held, 1, job("held"))
+        
+        self.router.close(self.jobs)
+        
+        self.assertTrue(self.results[0].success)
+        self.assertFalse(self.results[1].success)
+        self.assertEqual(self.results[1].job, job("held"))
+        self.assertEqual(self.router._waiting, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Stage tracking in OutputMonitor"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import playlis  # noqa: E402
+
+
+class StageTrackingTest(unittest.TestCase):
+    
+    def feed(self, lines):
+        """Feed lines one by one and return the stage after each"""
+        monitor = playlis.OutputMonitor("ytsearch1:artist song", 50)
+        stages = []
+        for line in lines:
+            monitor.feed(line)
+            stages.append(monitor.stage)
+        return monitor, stages
+    
+    def test_search_job_enters_transfer_at_destination(self):
+        monitor, stages = self.feed([
+            '[youtube:search] Extracting URL: ytsearch1:artist song',
+            '[download] Downloading playlist: artist song',
+            '[youtube:search] Playlist artist song: Downloading 1 items of 1',
+            '[download] Downloading item 1 of 1',
+            '[youtube] Extracting URL: https://www.youtube.com/watch?v=abc',
+            '[youtube] abc: Downloading webpage',
+            '[info] abc: Downloading 1 format(s): 251',
+            '[download] Destination: downloads/song.webm',
+            '[download]  50.0% of    3.00MiB at    1.00MiB/s ETA 00:01',
+            '[download] 100% of    3.00MiB in 00:00:02 at 1.50MiB/s',
+            '[ExtractAudio] Destination: downloads/song.mp3',
+        ])
+        self.assertEqual(stages, [
+            "search", "search", "search", "search",
+            "extract", "extract", "extract",
+            "transfer", "transfer", "transfer",
+            "extract_audio",
+        ])
+        self.assertEqual(
+            set(monitor.close_stages()),
+            {"search", "extract", "transfer", "extract_audio"}
+        )
+    
+    def test_progress_line_opens_transfer(self):
+        _, stages = self.feed([
+            '[youtube] abc: Downloading webpage',
+            '[download]  10.0% of    3.00MiB at    1.00MiB/s ETA 00:03',
+        ])
+        self.assertEqual(stages, ["extract", "transfer"])
+    
+    def test_other_download_lines_keep_the_stage(self):
+        _, stages = self.feed([
+            '[youtube] abc: Downloading webpage',
+            '[download] downloads/song.mp3 has already been downloaded',
+        ])
+        self.assertEqual(stages, ["extract", "extract"])
+
+
+if __name__ == "__main__":
+    unittest.main()
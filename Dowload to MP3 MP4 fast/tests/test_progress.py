@@ -0,0 +1,84 @@
+"""Parsing of yt-dlp --newline progress lines"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import playlis  # noqa: E402
+
+MIB = 1024 * 1024
+
+
+class ParseProgressLineTest(unittest.TestCase):
+    
+    def test_running_download(self):
+        event = playlis.parse_progress_line(
+            "[download]  42.5% of   10.00MiB at    2.00MiB/s ETA 00:03", "ytsearch1:song"
+        )
+        
+        self.assertEqual(event, playlis.ProgressEvent(
+            target="ytsearch1:song",
+            percent=42.5,
+            downloaded_bytes=int(10 * MIB * 0.425),
+            total_bytes=10 * MIB,
+            speed=2 * MIB,
+            eta=3
+        ))
+    
+    def test_finished_download(self):
+        event = playlis.parse_progress_line("[download] 100% of    3.00MiB in 00:00:02 at 1.50MiB/s")
+        
+        self.assertEqual((event.percent, event.total_bytes, event.speed, event.eta), (100.0, 3 * MIB, 1.5 * MIB, None))
+    
+    def test_estimated_size_and_long_eta(self):
+        event = playlis.parse_progress_line("[download]   1.0% of ~  1.50GiB at  512.00KiB/s ETA 01:02:03")
+        
+        self.assertEqual(event.total_bytes, int(1.5 * 1024 * MIB))
+        self.assertEqual(event.speed, 512 * 1024)
+        self.assertEqual(event.eta, 3723)
+    
+    def test_unknown_size_and_speed(self):
+        event = playlis.parse_progress_line("[download]   5.0% of Unknown total size at Unknown speed ETA Unknown")
+        
+        self.assertEqual(event.percent, 5.0)
+        self.assertIsNone(event.total_bytes)
+        self.assertIsNone(event.downloaded_bytes)
+        self.assertIsNone(event.speed)
+    
+    def test_other_lines_are_not_progress(self):
+        for line in (
+            "[download] Destination: downloads/song.webm",
+            "[download] downloads/song.mp3 has already been downloaded",
+            "[youtube] abc: Downloading webpage",
+            "ERROR: [youtube] abc: Video unavailable",
+            "",
+        ):
+            with self.subTest(line=line):
+                self.assertIsNone(playlis.parse_progress_line(line))
+
+
+class ProgressCallbackTest(unittest.TestCase):
+    
+    def test_monitor_reports_events_and_transferred_bytes(self):
+        events, transferred = [], []
+        monitor = playlis.OutputMonitor(
+            "ytsearch1:song", 50, progress_callback=events.append, bytes_callback=transferred.append
+        )
+        for line in (
+            "[download] Destination: downloads/song.f137.mp4",
+            "[download]  50.0% of    4.00MiB at    1.00MiB/s ETA 00:02",
+            "[download] 100% of    4.00MiB in 00:00:04 at 1.00MiB/s",
+            "[download] Destination: downloads/song.f140.m4a",
+            "[download]  50.0% of    2.00MiB at    1.00MiB/s ETA 00:01",
+        ):
+            monitor.feed(line + "\r\n")
+        
+        self.assertEqual([e.percent for e in events], [50.0, 100.0, 50.0])
+        self.assertEqual(transferred, [2 * MIB, 2 * MIB, 1 * MIB])
+        self.assertEqual(monitor.lines[-1], "[download] Destination: downloads/song.f140.m4a")
+
+
+if __name__ == "__main__":
+    unittest.main()
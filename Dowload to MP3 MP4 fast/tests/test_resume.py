@@ -0,0 +1,72 @@
+"""Partial file cleanup in ResumeManager"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import playlis  # noqa: E402
+
+
+def job(name: str) -> playlis.DownloadJob:
+    return playlis.DownloadJob(query=f"ytsearch1:{name}", file_type=playlis.FileType.MP3, quality="320")
+
+
+class ResumeScanTest(unittest.TestCase):
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.config = playlis.Config(DOWNLOAD_DIR=self.dir)
+        self.logger = logging.getLogger("resume-test")
+    
+    def partial(self, name: str, age_minutes: float = 0) -> Path:
+        path = self.dir / name
+        path.write_bytes(b"x")
+        stamp = time.time() - age_minutes * 60
+        os.utime(path, (stamp, stamp))
+        return path
+    
+    def test_recent_unowned_partial_is_kept(self):
+        recent = self.partial("other process.webm.part")
+        old = self.partial("crashed.webm.part", age_minutes=self.config.ORPHAN_PARTIAL_MINUTES + 1)
+        
+        playlis.ResumeManager(self.config, self.logger).scan()
+        
+        self.assertTrue(recent.exists())
+        self.assertFalse(old.exists())
+    
+    def test_partial_registered_by_another_process_is_kept(self):
+        mine = playlis.ResumeManager(self.config, self.logger)
+        other = playlis.ResumeManager(self.config, self.logger)
+        other.register(job("theirs"))
+        other.add_destination(job("theirs"), str(self.dir / "theirs.webm"))
+        theirs = self.partial("theirs.webm.part", age_minutes=self.config.ORPHAN_PARTIAL_MINUTES + 1)
+        
+        self.assertEqual(mine.scan(), [job("theirs")])
+        self.assertTrue(theirs.exists())
+    
+    def test_discard_removes_only_dropped_jobs_partials(self):
+        resume = playlis.ResumeManager(self.config, self.logger)
+        for name in ("dropped", "kept"):
+            resume.register(job(name))
+            resume.add_destination(job(name), str(self.dir / f"{name}.webm"))
+        dropped = self.partial("dropped.webm.part")
+        kept = self.partial("kept.webm.part")
+        unowned = self.partial("someone else.webm.part")
+        
+        resume.discard([job("dropped")])
+        
+        self.assertFalse(dropped.exists())
+        self.assertTrue(kept.exists())
+        self.assertTrue(unowned.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""Failure classification and backoff in RetryPolicy"""
+
+import logging
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import playlis  # noqa: E402
+
+ErrorClass = playlis.ErrorClass
+
+
+class ClassifyTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.policy = playlis.RetryPolicy(playlis.Config())
+    
+    def test_error_lines(self):
+        cases = {
+            "ERROR: [youtube] abc: Video unavailable": ErrorClass.PERMANENT,
+            "ERROR: [youtube] abc: Private video. Sign in if you've been granted access": ErrorClass.PERMANENT,
+            "ERROR: unable to download video data: HTTP Error 404: Not Found": ErrorClass.PERMANENT,
+            "ERROR: unable to download webpage: HTTP Error 429: Too Many Requests": ErrorClass.RATE_LIMITED,
+            "ERROR: [youtube] abc: Sign in to confirm you're not a bot": ErrorClass.RATE_LIMITED,
+            "ERROR: [download] Got error: [Errno 104] Connection reset by peer": ErrorClass.TRANSIENT,
+            "": ErrorClass.TRANSIENT,
+        }
+        for errors, expected in cases.items():
+            with self.subTest(errors=errors):
+                self.assertEqual(self.policy.classify(1, errors), expected)
+    
+    def test_usage_error_is_permanent(self):
+        self.assertEqual(self.policy.classify(2, ""), ErrorClass.PERMANENT)
+    
+    def test_local_errors_are_permanent(self):
+        for error in (FileNotFoundError(2, "yt-dlp.exe"), PermissionError(13, "denied")):
+            with self.subTest(error=type(error).__name__):
+                self.assertEqual(self.policy.classify(None, "", error), ErrorClass.PERMANENT)
+    
+    def test_network_and_timeout_errors_are_transient(self):
+        for error in (ConnectionResetError(), playlis.WatchdogTimeout("stall")):
+            with self.subTest(error=type(error).__name__):
+                self.assertEqual(self.policy.classify(None, "", error), ErrorClass.TRANSIENT)
+
+
+class DelayTest(unittest.TestCase):
+    
+    def setUp(self):
+        random.seed(1)
+        self.config = playlis.Config(
+            RETRY_BACKOFF_BASE=2.0, RETRY_BACKOFF_MAX=10.0,
+            RATE_LIMIT_COOLDOWN=60.0, RATE_LIMIT_COOLDOWN_MAX=100.0
+        )
+        self.policy = playlis.RetryPolicy(self.config)
+    
+    def assertJittered(self, error_class, attempt, backoff):
+        for _ in range(50):
+            delay = self.policy.delay(error_class, attempt)
+            self.assertGreaterEqual(delay, backoff / 2)
+            self.assertLessEqual(delay, backoff)
+    
+    def test_transient_backoff_doubles_up_to_the_cap(self):
+        self.assertJittered(ErrorClass.TRANSIENT, 1, 2.0)
+        self.assertJittered(ErrorClass.TRANSIENT, 2, 4.0)
+        self.assertJittered(ErrorClass.TRANSIENT, 5, 10.0)
+    
+    def test_rate_limit_uses_the_cooldown(self):
+        self.assertJittered(ErrorClass.RATE_LIMITED, 1, 60.0)
+        self.assertJittered(ErrorClass.RATE_LIMITED, 2, 100.0)
+
+
+class MissingExecutableTest(unittest.TestCase):
+    
+    def test_missing_ytdlp_is_not_retried(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        config = playlis.Config(
+            YTDLP=Path(tmp.name) / "missing" / "yt-dlp.exe",
+            DOWNLOAD_DIR=Path(tmp.name),
+            ENGINE="subprocess"
+        )
+        downloader = playlis.Downloader(config, logging.getLogger("retry-test"))
+        self.addCleanup(downloader.jobs._conn.close)
+        
+        result = downloader._execute_download([str(config.YTDLP), "ytsearch1:song"], "MP3")
+        
+        self.assertFalse(result.success)
+        self.assertEqual(result.attempts, 1)
+        self.assertEqual(result.error_class, ErrorClass.PERMANENT)
+
+
+if __name__ == "__main__":
+    unittest.main()
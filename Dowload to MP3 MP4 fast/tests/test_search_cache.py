@@ -0,0 +1,105 @@
+"""Query normalization and the persistent search cache"""
+
+import logging
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import playlis  # noqa: E402
+
+normalize_query = playlis.normalize_query
+
+
+class NormalizeQueryTest(unittest.TestCase):
+    
+    def test_equivalent_spellings_match(self):
+        cases = [
+            ("Bodyslam  -  ความเชื่อ", "bodyslam - ความเชื่อ"),
+            ("BODYSLAM", "bodyslam"),
+            ("\ufeffลม\u200bหายใจ\u00ad", "ลมหายใจ"),
+            # Nikhahit + sara aa typed for sara am, also around a tone mark
+            ("นํา", "นำ"),
+            ("น้ํา", "น้ำ"),
+            ("นํ้า", "น้ำ"),
+            # Spaces between Thai words are optional
+            ("คิดถึง เธอ", "คิดถึงเธอ"),
+            ("Cafe\u0301", "Caf\u00e9"),
+        ]
+        for raw, expected in cases:
+            with self.subTest(raw=raw):
+                self.assertEqual(normalize_query(raw), normalize_query(expected))
+    
+    def test_meaningful_differences_are_kept(self):
+        self.assertNotEqual(normalize_query("love song"), normalize_query("lovesong"))
+        self.assertNotEqual(normalize_query("Bodyslam ความเชื่อ"), normalize_query("Bodyslamความเชื่อ"))
+        self.assertNotEqual(normalize_query("ใกล้"), normalize_query("ไกล"))
+
+
+class SearchCacheTest(unittest.TestCase):
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.config = playlis.Config(DOWNLOAD_DIR=Path(tmp.name), SEARCH_CACHE_SIZE=3)
+        self.logger = logging.getLogger("search-cache-test")
+        self.cache = self.open_cache()
+    
+    def open_cache(self) -> playlis.SearchCache:
+        cache = playlis.SearchCache(self.config, self.logger)
+        # Write before the directory goes, not at interpreter exit
+        self.addCleanup(cache.flush)
+        return cache
+    
+    def test_hit_ignores_spelling(self):
+        self.cache.put("ลม หายใจ", "abcdefghij1")
+        
+        self.assertEqual(self.cache.get("ลมหายใจ\u200b"), "abcdefghij1")
+        self.assertIsNone(self.cache.get("ลม"))
+    
+    def test_expired_entry_is_a_miss(self):
+        self.cache.put("song", "abcdefghij1")
+        self.cache._entries[normalize_query("song")] = ("abcdefghij1", time.time() - self.cache.ttl - 1)
+        
+        self.assertIsNone(self.cache.get("song"))
+    
+    def test_least_recently_used_entry_is_evicted(self):
+        for i in range(3):
+            self.cache.put(f"song {i}", f"abcdefghij{i}")
+        self.cache.get("song 0")
+        
+        self.cache.put("song 3", "abcdefghij3")
+        
+        self.assertIsNone(self.cache.get("song 1"))
+        self.assertEqual(self.cache.get("song 0"), "abcdefghij0")
+    
+    def test_puts_are_saved_in_batches(self):
+        self.config.SEARCH_CACHE_SIZE = 1000
+        for i in range(self.cache.SAVE_EVERY - 1):
+            self.cache.put(f"song {i}", "abcdefghij1")
+        self.assertFalse(self.cache.path.exists())
+        
+        self.cache.put("last", "abcdefghij2")
+        
+        self.assertEqual(len(self.open_cache()._entries), self.cache.SAVE_EVERY)
+    
+    def test_put_after_the_interval_is_saved(self):
+        self.cache._saved_at -= self.cache.SAVE_INTERVAL
+        
+        self.cache.put("song", "abcdefghij1")
+        
+        self.assertEqual(self.open_cache().get("song"), "abcdefghij1")
+    
+    def test_flush_writes_pending_entries(self):
+        self.cache.put("song", "abcdefghij1")
+        
+        self.cache.flush()
+        
+        self.assertEqual(self.open_cache().get("song"), "abcdefghij1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+"""SpotifyClient and SpotifyResolver against a local API stub"""
+
+import json
+import logging
+import sys
+import tempfile
+import unittest
+import urllib.parse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import playlis  # noqa: E402
+from spotify_stub import SpotifyStub, track, track_id  # noqa: E402
+
+
+class SpotifyTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        self.stub = SpotifyStub()
+        self.addCleanup(self.stub.stop)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.config = playlis.Config(
+            DOWNLOAD_DIR=Path(tmp.name),
+            SPOTIFY_CLIENT_ID="client",
+            SPOTIFY_CLIENT_SECRET="secret",
+            SPOTIFY_API_URL=f"{self.stub.url}/v1",
+            SPOTIFY_AUTH_URL=f"{self.stub.url}/token",
+        )
+        self.logger = logging.getLogger("spotify-test")
+    
+    def resolver(self) -> playlis.SpotifyResolver:
+        return playlis.SpotifyResolver(self.config, self.logger, self.stub.search)
+
+
+class SpotifyClientTest(SpotifyTestCase):
+    
+    def test_tracks_are_fetched_in_batches(self):
+        ids = [track_id(i) for i in range(120)]
+        for i, tid in enumerate(ids):
+            self.stub.tracks[tid] = track(tid, f"เพลง {i}", 180)
+        
+        tracks = playlis.SpotifyClient(self.config).tracks(ids)
+        
+        self.assertEqual([t.id for t in tracks], ids)
+        batches = [
+            urllib.parse.parse_qs(urllib.parse.urlparse(path).query)["ids"][0].split(",")
+            for path in self.stub.paths("/v1/tracks")
+        ]
+        self.assertEqual([len(batch) for batch in batches], [50, 50, 20])
+        self.assertEqual(sum(batches, []), ids)
+        # One token for every batch
+        self.assertEqual(len(self.stub.paths("/token")), 1)
+    
+    def test_unknown_tracks_are_dropped(self):
+        self.stub.tracks[track_id(1)] = track(track_id(1), "เพลง", 200)
+        tracks = playlis.SpotifyClient(self.config).tracks([track_id(1), track_id(2)])
+        self.assertEqual([t.id for t in tracks], [track_id(1)])
+    
+    def test_http_errors_map_to_error_classes(self):
+        cases = {
+            429: playlis.ErrorClass.RATE_LIMITED,
+            404: playlis.ErrorClass.PERMANENT,
+            400: playlis.ErrorClass.PERMANENT,
+            503: playlis.ErrorClass.TRANSIENT,
+        }
+        for code, error_class in cases.items():
+            with self.subTest(code=code):
+                self.stub.failures["/v1/tracks"] = code
+                with self.assertRaises(playlis.ResolveError) as caught:
+                    playlis.SpotifyClient(self.config).tracks([track_id(1)])
+                self.assertEqual(caught.exception.error_class, error_class)
+                self.assertIn(str(code), str(caught.exception))
+    
+    def test_missing_credentials_are_permanent(self):
+        self.config.SPOTIFY_CLIENT_SECRET = ""
+        with self.assertRaises(playlis.ResolveError) as caught:
+            playlis.SpotifyClient(self.config).tracks([track_id(1)])
+        self.assertEqual(caught.exception.error_class, playlis.ErrorClass.PERMANENT)
+        self.assertEqual(self.stub.requests, [])
+
+
+class SpotifyResolverTest(SpotifyTestCase):
+    
+    def add_track(self, number: int, duration: float, candidates: list) -> str:
+        tid = track_id(number)
+        self.stub.tracks[tid] = track(tid, f"เพลง {number}", duration)
+        self.stub.search_results[f"ศิลปิน - เพลง {number}"] = candidates
+        return tid
+    
+    def test_match_picks_closest_duration(self):
+        tid = self.add_track(1, 180, [
+            {"id": "cover", "duration": 240},
+            {"id": "official", "duration": 182},
+            {"id": "live", "duration": 175},
+        ])
+        mapping = self.resolver().resolve(tid)
+        self.assertEqual(mapping["video_id"], "official")
+        self.assertEqual(mapping["artist"], "ศิลปิน")
+        self.assertEqual(mapping["duration"], 180)
+    
+    def test_match_outside_tolerance_uses_first_result(self):
+        tid = self.add_track(1, 180, [
+            {"id": "first", "duration": 600},
+            {"id": "second", "duration": 400},
+            {"id": "no-duration"},
+        ])
+        self.assertEqual(self.resolver().resolve(tid)["video_id"], "first")
+    
+    def test_failures_become_error_entries(self):
+        found = self.add_track(1, 180, [{"id": "video", "duration": 180}])
+        no_results = self.add_track(2, 180, [])
+        missing = track_id(3)
+        
+        results = self.resolver().resolve_many([found, no_results, missing])
+        
+        self.assertEqual(results[found]["video_id"], "video")
+        for tid in (no_results, missing):
+            self.assertEqual(results[tid]["error_class"], playlis.ErrorClass.PERMANENT.value)
+    
+    def test_mappings_persist_across_instances(self):
+        found = self.add_track(1, 180, [{"id": "video", "duration": 181}])
+        no_results = self.add_track(2, 180, [])
+        self.resolver().resolve_many([found, no_results])
+        
+        with open(self.config.DOWNLOAD_DIR / self.config.SPOTIFY_CACHE_FILE_NAME, encoding="utf-8") as f:
+            self.assertEqual(set(json.load(f)), {found})  # failures are not cached
+        
+        self.stub.requests.clear()
+        resolver = self.resolver()
+        self.assertEqual(resolver.cached(found)["video_id"], "video")
+        self.assertEqual(resolver.resolve(found)["video_id"], "video")
+        self.assertEqual(self.stub.requests, [])
+        
+        # A failed track is looked up again
+        self.stub.search_results["ศิลปิน - เพลง 2"] = [{"id": "later", "duration": 180}]
+        self.assertEqual(resolver.resolve(no_results)["video_id"], "later")
+
+
+if __name__ == "__main__":
+    unittest.main()
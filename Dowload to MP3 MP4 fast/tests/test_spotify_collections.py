@@ -0,0 +1,127 @@
+"""Spotify playlist/album expansion into download jobs"""
+
+import json
+import logging
+import sys
+import tempfile
+import unittest
+import urllib.parse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import playlis  # noqa: E402
+from spotify_stub import SpotifyStub, track, track_id  # noqa: E402
+
+PLAYLIST_ID = "37i9dQZF1DXcBWIGoYBM5M"
+ALBUM_ID = "4aawyAB9vmqN3uQ7FjRGTy"
+
+
+class SpotifyCollectionTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.stub = SpotifyStub()
+        self.addCleanup(self.stub.stop)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.config = playlis.Config(
+            DOWNLOAD_DIR=Path(tmp.name),
+            SPOTIFY_CLIENT_ID="client",
+            SPOTIFY_CLIENT_SECRET="secret",
+            SPOTIFY_API_URL=f"{self.stub.url}/v1",
+            SPOTIFY_AUTH_URL=f"{self.stub.url}/token",
+        )
+        self.logger = logging.getLogger("spotify-test")
+    
+    def add_playlist(self, numbers) -> list:
+        """Playlist items wrap each track; returns the track ids"""
+        ids = [track_id(n) for n in numbers]
+        self.stub.collections[f"playlists/{PLAYLIST_ID}"] = [
+            {"track": track(tid, f"เพลง {n}", 180)} for n, tid in zip(numbers, ids)
+        ]
+        return ids
+    
+    def page_params(self, kind: str) -> list:
+        """(offset, limit) of every page request for a collection kind"""
+        params = []
+        for path in self.stub.paths(f"/v1/{kind}/"):
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(path).query)
+            params.append((int(query.get("offset", ["0"])[0]), int(query["limit"][0])))
+        return params
+    
+    def test_playlist_pages_follow_next_links(self):
+        ids = self.add_playlist(range(250))
+        
+        tracks = playlis.SpotifyClient(self.config).collection_tracks("playlist", PLAYLIST_ID)
+        
+        self.assertEqual([t.id for t in tracks], ids)
+        self.assertEqual(self.page_params("playlists"), [(0, 100), (100, 100), (200, 100)])
+    
+    def test_album_items_are_bare_tracks(self):
+        ids = [track_id(n) for n in range(60)]
+        self.stub.collections[f"albums/{ALBUM_ID}"] = [track(tid, f"เพลง {n}", 200) for n, tid in enumerate(ids)]
+        
+        tracks = playlis.SpotifyClient(self.config).collection_tracks("album", ALBUM_ID)
+        
+        self.assertEqual([t.id for t in tracks], ids)
+        self.assertEqual(tracks[0].title, "เพลง 0")
+        self.assertEqual(tracks[0].duration, 200)
+        self.assertEqual(self.page_params("albums"), [(0, 50), (50, 50)])
+    
+    def test_playlist_skips_items_without_a_track(self):
+        kept = track_id(1)
+        self.stub.collections[f"playlists/{PLAYLIST_ID}"] = [
+            {"track": None},  # removed from Spotify
+            {"track": {**track(track_id(2), "podcast", 1800), "type": "episode"}},
+            {"track": {**track(track_id(3), "local file", 180), "id": None}},
+            {"track": track(kept, "เพลง", 180)},
+        ]
+        tracks = playlis.SpotifyClient(self.config).collection_tracks("playlist", PLAYLIST_ID)
+        self.assertEqual([t.id for t in tracks], [kept])
+    
+    def test_unsupported_kind_is_permanent(self):
+        with self.assertRaises(playlis.ResolveError) as caught:
+            playlis.SpotifyClient(self.config).collection_tracks("artist", PLAYLIST_ID)
+        self.assertEqual(caught.exception.error_class, playlis.ErrorClass.PERMANENT)
+        self.assertEqual(self.stub.requests, [])
+    
+    def test_expand_dedupes_in_collection_order(self):
+        self.add_playlist([3, 1, 3, 2, 1])
+        resolver = playlis.SpotifyResolver(self.config, self.logger, self.stub.search)
+        
+        tracks = resolver.expand("playlist", PLAYLIST_ID)
+        
+        self.assertEqual([t.id for t in tracks], [track_id(3), track_id(1), track_id(2)])
+        # Expanded metadata is reused instead of another /tracks call
+        self.stub.search_results["ศิลปิน - เพลง 3"] = [{"id": "video", "duration": 180}]
+        self.assertEqual(resolver.resolve(track_id(3))["video_id"], "video")
+        self.assertEqual(self.stub.paths("/v1/tracks"), [])
+    
+    def test_spotify_jobs_skip_archived_tracks(self):
+        archived, cached, fresh = self.add_playlist([1, 2, 3])
+        mappings = {
+            archived: {"video_id": "archivedVid", "title": "เพลง 1", "artist": "ศิลปิน", "duration": 180},
+            cached: {"video_id": "cachedVideo", "title": "เพลง 2", "artist": "ศิลปิน", "duration": 180},
+        }
+        with open(self.config.DOWNLOAD_DIR / self.config.SPOTIFY_CACHE_FILE_NAME, "w", encoding="utf-8") as f:
+            json.dump(mappings, f)
+        
+        downloader = playlis.Downloader(self.config, self.logger)
+        quality = playlis.QualitySettings.get_audio_quality("1")
+        done = playlis.DownloadJob(playlis.YOUTUBE_WATCH_URL.format("archivedVid"), playlis.FileType.MP3, quality)
+        downloader.archive.add(done, {"id": "archivedVid", "extractor_key": "Youtube"})
+        url = f"https://open.spotify.com/playlist/{PLAYLIST_ID}"
+        
+        jobs = downloader.spotify_jobs(url, playlis.FileType.MP3, quality)
+        self.assertEqual(
+            [job.query for job in jobs],
+            [playlis.SPOTIFY_TRACK_URL.format(tid) for tid in (cached, fresh)]
+        )
+        
+        # The archive is per file type and preset
+        jobs = downloader.spotify_jobs(url, playlis.FileType.MP4, playlis.QualitySettings.get_video_format("1"))
+        self.assertEqual(len(jobs), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()